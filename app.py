@@ -1,27 +1,43 @@
 import os
+import asyncio
 from pathlib import Path
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Handlers only enqueue log records; a background listener thread writes them
+# out, so a slow stdout/pipe never stalls the event loop
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+log_listener = QueueListener(_log_queue, _log_handler)
 
 logging.basicConfig(
-    level=logging.DEBUG,  # or INFO, WARNING, etc.
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),  # DEBUG enables per-clip logs
+    handlers=[QueueHandler(_log_queue)]
 )
+log_listener.start()
+logger = logging.getLogger(__name__)
 
 # Import route modules
 from app.routes import main, admin, camera, websocket, notifications
-from app.core.database import engine
+from app.core.camera_cache import load_camera_cache
+from app.core.database import engine, create_search_index
 from app.core.websocket_manager import manager
+from app.core.yolo_runner import warmup_yolo
 from app.models.camera import Base
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+create_search_index()
 
-app = FastAPI(title="Camera Streaming Service")
+app = FastAPI(title="Camera Streaming Service", default_response_class=ORJSONResponse)
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -34,9 +50,23 @@ app.include_router(camera.router)
 app.include_router(websocket.router)
 app.include_router(notifications.router)
 
+@app.on_event("startup")
+async def startup_event():
+    await asyncio.to_thread(load_camera_cache)
+    app.state.subscription_writer = asyncio.create_task(notifications.subscription_writer())
+    # Warm up YOLO off the event loop so the first clip doesn't pay cold-start cost.
+    # A failed warm-up must not keep the server from starting; clips will report it
+    try:
+        await asyncio.to_thread(warmup_yolo)
+    except Exception:
+        logger.exception("⚠️ YOLO warm-up failed, continuing without it")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     await manager.disconnect_all()
+    app.state.subscription_writer.cancel()
+    await notifications.flush_pending_subscriptions()
+    log_listener.stop()
 
 if __name__ == "__main__":
     # Create directories
@@ -1,10 +1,12 @@
 from .alerts import send_alert_message
-from .yolo_runner import run_yolo_on_webm
+from .yolo_runner import run_yolo_on_webm, run_yolo_on_webm_sync, warmup_yolo
 from .database import *
 from .security import *
 from .websocket_manager import *
 
 __all__ = [
     'send_alert_message',
-    'run_yolo_on_webm'
+    'run_yolo_on_webm',
+    'run_yolo_on_webm_sync',
+    'warmup_yolo'
 ]
\ No newline at end of file
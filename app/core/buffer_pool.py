@@ -0,0 +1,34 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+# Free-list of clip receive buffers, bucketed by size rounded up to 1 MB.
+# Buffers are reused across clips instead of allocating and freeing
+# multi-MB bytearrays every few seconds per camera.
+BUFFER_BUCKET_SIZE = 1024 * 1024
+MAX_BUFFERS_PER_BUCKET = 4
+MAX_POOLED_BYTES = 256 * 1024 * 1024  # Total memory the pool may hold on to
+
+_buffer_pool: Dict[int, Deque[bytearray]] = defaultdict(deque)
+_pooled_bytes = 0
+
+def get_buffer(size: int) -> bytearray:
+    """Get a buffer of at least `size` bytes, reusing a pooled one when available"""
+    global _pooled_bytes
+    bucket = max(-(-size // BUFFER_BUCKET_SIZE), 1) * BUFFER_BUCKET_SIZE
+    pool = _buffer_pool.get(bucket)
+    if pool:
+        _pooled_bytes -= bucket
+        return pool.pop()
+    return bytearray(bucket)
+
+def return_buffer(buf: bytearray) -> None:
+    """Return a buffer to the pool; buffers that don't fit are left to the GC"""
+    global _pooled_bytes
+    size = len(buf)
+    if size == 0 or size % BUFFER_BUCKET_SIZE:
+        return  # Resized while in use, no longer matches a bucket
+
+    pool = _buffer_pool[size]
+    if len(pool) < MAX_BUFFERS_PER_BUCKET and _pooled_bytes + size <= MAX_POOLED_BYTES:
+        pool.append(buf)
+        _pooled_bytes += size
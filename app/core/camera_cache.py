@@ -0,0 +1,57 @@
+import asyncio
+from typing import Dict, Optional, Set
+
+from app.core.database import SessionLocal
+from app.models.camera import Camera
+
+# Active cameras by token and by public slug, loaded once at startup and kept in
+# sync by the admin routes, so WebSocket handshakes and polling requests don't
+# need a session and a SQL round trip to check a token
+TOKEN_CACHE: Dict[str, int] = {}
+SLUG_CACHE: Dict[str, int] = {}
+ID_CACHE: Set[int] = set()
+
+def load_camera_cache() -> None:
+    """Populate the caches from all active cameras (blocking, run off the event loop)"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Camera.id, Camera.camera_token, Camera.public_slug).filter(Camera.is_active == True).all()
+    finally:
+        db.close()
+
+    TOKEN_CACHE.clear()
+    SLUG_CACHE.clear()
+    ID_CACHE.clear()
+    for camera_id, token, slug in rows:
+        cache_camera(camera_id, token, slug)
+
+def cache_camera(camera_id: int, token: str, slug: str) -> None:
+    TOKEN_CACHE[token] = camera_id
+    SLUG_CACHE[slug] = camera_id
+    ID_CACHE.add(camera_id)
+
+def uncache_camera(camera_id: int, token: str, slug: str) -> None:
+    TOKEN_CACHE.pop(token, None)
+    SLUG_CACHE.pop(slug, None)
+    ID_CACHE.discard(camera_id)
+
+def _query_camera_by_token(token: str):
+    db = SessionLocal()
+    try:
+        return db.query(Camera.id, Camera.public_slug).filter(
+            Camera.camera_token == token, Camera.is_active == True
+        ).first()
+    finally:
+        db.close()
+
+async def lookup_camera_id(token: str) -> Optional[int]:
+    """Resolve a camera token to its id, falling back to the database on a cache miss"""
+    camera_id = TOKEN_CACHE.get(token)
+    if camera_id is not None:
+        return camera_id
+
+    row = await asyncio.to_thread(_query_camera_by_token, token)
+    if row is None:
+        return None
+    cache_camera(row.id, token, row.public_slug)
+    return row.id
@@ -1,14 +1,63 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text
+import logging
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # Database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./cameras.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Pooled connections so the per-connection PRAGMAs below (and SQLite's page
+# cache) survive between requests; file databases default to NullPool
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the writer; NORMAL sync is durable in WAL mode
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB
+    cursor.close()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Trigram full-text index over camera name/location for substring search,
+# kept in sync with the cameras table by triggers (needs SQLite 3.34+)
+SEARCH_INDEX_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cameras_fts USING fts5("
+    "name, location, content='cameras', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS cameras_fts_ai AFTER INSERT ON cameras BEGIN "
+    "INSERT INTO cameras_fts(rowid, name, location) VALUES (new.id, new.name, new.location); END",
+    "CREATE TRIGGER IF NOT EXISTS cameras_fts_ad AFTER DELETE ON cameras BEGIN "
+    "INSERT INTO cameras_fts(cameras_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); END",
+    "CREATE TRIGGER IF NOT EXISTS cameras_fts_au AFTER UPDATE ON cameras BEGIN "
+    "INSERT INTO cameras_fts(cameras_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+    "INSERT INTO cameras_fts(rowid, name, location) VALUES (new.id, new.name, new.location); END",
+    "INSERT INTO cameras_fts(cameras_fts) VALUES ('rebuild')",
+)
+search_index_available = False
+
+def create_search_index():
+    """Create the full-text search index where SQLite supports it"""
+    global search_index_available
+    try:
+        with engine.begin() as conn:
+            for statement in SEARCH_INDEX_STATEMENTS:
+                conn.execute(text(statement))
+        search_index_available = True
+    except OperationalError as e:
+        logger.warning("⚠️ Full-text search index unavailable, falling back to LIKE: %s", e)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -1,14 +1,19 @@
+import hashlib
 import secrets
+import uuid
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from passlib.context import CryptContext
 
 # Security setup
 security = HTTPBasic()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "admin123"  # In production, use environment variables
 
+# Credentials are compared as SHA-256 digests so compare_digest always sees
+# equal-length inputs and doesn't leak the expected lengths
+ADMIN_USERNAME_HASH = hashlib.sha256(ADMIN_USERNAME.encode()).digest()
+ADMIN_PASSWORD_HASH = hashlib.sha256(ADMIN_PASSWORD.encode()).digest()
+
 # WebPush VAPID keys (in production, generate proper keys)
 VAPID_PRIVATE_KEY = "your-vapid-private-key"
 VAPID_PUBLIC_KEY = "your-vapid-public-key"
@@ -16,8 +21,8 @@ VAPID_CLAIMS = {"sub": "mailto:admin@example.com"}
 
 # Admin authentication
 def authenticate_admin(credentials: HTTPBasicCredentials = Depends(security)):
-    correct_username = secrets.compare_digest(credentials.username, ADMIN_USERNAME)
-    correct_password = secrets.compare_digest(credentials.password, ADMIN_PASSWORD)
+    correct_username = secrets.compare_digest(hashlib.sha256(credentials.username.encode()).digest(), ADMIN_USERNAME_HASH)
+    correct_password = secrets.compare_digest(hashlib.sha256(credentials.password.encode()).digest(), ADMIN_PASSWORD_HASH)
     if not (correct_username and correct_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,8 +32,9 @@ def authenticate_admin(credentials: HTTPBasicCredentials = Depends(security)):
     return credentials.username
 
 # Utility functions
+# uuid4 hex skips token_urlsafe's base64 pass; slugs and tokens are unique-constrained in the DB
 def generate_slug():
-    return secrets.token_urlsafe(8)
+    return uuid.uuid4().hex[:11]
 
 def generate_camera_token():
-    return secrets.token_urlsafe(16)
+    return uuid.uuid4().hex  # 122 random bits
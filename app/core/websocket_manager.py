@@ -3,9 +3,12 @@ from starlette.websockets import WebSocketState
 from fastapi import WebSocket
 import os
 import asyncio
+import logging
 import json
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 SAVE_DIR = "./recordings"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
@@ -18,21 +21,23 @@ class ConnectionManager:
         self.viewers: Dict[str, List[WebSocket]] = {}
 
     async def connect_camera(self, websocket: WebSocket, camera_token: str):
+        # No TCP_NODELAY tuning needed: asyncio and uvloop already disable
+        # Nagle on every accepted TCP socket, and ASGI doesn't expose it anyway
         await websocket.accept()
 
         # Force disconnect existing camera (only 1 allowed per token)
         old_ws = self.active_connections.get(camera_token)
         if old_ws and old_ws.client_state == WebSocketState.CONNECTED:
-            print(f"🔄 Replacing existing camera connection for token {camera_token}")
+            logger.info(f"🔄 Replacing existing camera connection for token {camera_token}")
             try:
                 await old_ws.close(code=4000)
-                print(f"🔌 Closed existing camera connection for token {camera_token}")
+                logger.info(f"🔌 Closed existing camera connection for token {camera_token}")
             except Exception as e:
-                print(f"⚠️ Failed to close old camera socket: {e}")
+                logger.warning(f"⚠️ Failed to close old camera socket: {e}")
 
         self.active_connections[camera_token] = websocket
         self.viewers.setdefault(camera_token, [])
-        print(f"🎥 Camera connected: {camera_token}")
+        logger.info(f"🎥 Camera connected: {camera_token}")
 
     async def connect_viewer(self, websocket: WebSocket, camera_token: str):
         await websocket.accept()
@@ -40,18 +45,18 @@ class ConnectionManager:
         self.viewers.setdefault(camera_token, [])
         if websocket not in self.viewers[camera_token]:
             self.viewers[camera_token].append(websocket)
-            print(f"👁️ Viewer connected to {camera_token} (total: {len(self.viewers[camera_token])})")
+            logger.info(f"👁️ Viewer connected to {camera_token} (total: {len(self.viewers[camera_token])})")
 
     def disconnect_camera(self, camera_token: str):
         if camera_token in self.active_connections:
             del self.active_connections[camera_token]
-            print(f"❌ Camera disconnected: {camera_token}")
+            logger.info(f"❌ Camera disconnected: {camera_token}")
 
     def disconnect_viewer(self, websocket: WebSocket, camera_token: str):
         if camera_token in self.viewers:
             try:
                 self.viewers[camera_token].remove(websocket)
-                print(f"👋 Viewer disconnected from {camera_token}")
+                logger.info(f"👋 Viewer disconnected from {camera_token}")
             except ValueError:
                 pass
 
@@ -67,7 +72,7 @@ class ConnectionManager:
 
         for ws in self.viewers[camera_token]:
             if ws.client_state != WebSocketState.CONNECTED:  # WebSocketState.CONNECTED
-                print(f"⚠️ Viewer {ws} is not connected, removing...")
+                logger.debug(f"⚠️ Viewer {ws} is not connected, removing...")
                 continue
             try:
                 if is_binary:
@@ -75,7 +80,7 @@ class ConnectionManager:
                 else:
                     await ws.send_text(data)
             except Exception as e:
-                print(f"⚠️ Failed to send to viewer: {e}")
+                logger.warning(f"⚠️ Failed to send to viewer: {e}")
                 disconnected.append(ws)
 
         # Remove dead sockets
@@ -98,27 +103,22 @@ class ConnectionManager:
 
 
     async def disconnect_all(self):
-        print("🧹 Disconnecting all WebSocket connections...")
+        logger.info("🧹 Disconnecting all WebSocket connections...")
 
-        # Disconnect cameras
-        for token, ws in self.active_connections.items():
-            try:
-                await ws.close(code=1001)
-                print(f"Closed camera for token {token}")
-            except Exception as e:
-                print(f"Error closing camera {token}: {e}")
+        # Snapshot and clear first: closing awaits, and disconnect handlers
+        # mutate these dicts while we wait
+        sockets = [(token, ws) for token, ws in self.active_connections.items()]
+        sockets += [(token, ws) for token, viewers in self.viewers.items() for ws in viewers]
         self.active_connections.clear()
-
-        # Disconnect viewers
-        for token, viewer_list in self.viewers.items():
-            for ws in viewer_list:
-                try:
-                    await ws.close(code=1001)
-                    print(f"Closed viewer for token {token}")
-                except Exception as e:
-                    print(f"Error closing viewer for {token}: {e}")
         self.viewers.clear()
 
+        # Close everything concurrently instead of one round trip at a time
+        results = await asyncio.gather(*(ws.close(code=1001) for _, ws in sockets), return_exceptions=True)
+        for (token, _), result in zip(sockets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error closing socket for {token}: {result}")
+        logger.debug(f"Closed {len(sockets)} WebSocket connections")
+
     # DEPRECATED: No longer needed with HTTP polling
     # async def broadcast_processed_video_to_viewers(self, camera_token: str, video_data: bytes, metadata: dict):
     #     """Broadcast processed video clip with metadata to all viewers"""
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.core.camera_cache import cache_camera, uncache_camera
 from app.core.database import get_db
 from app.core.security import authenticate_admin, generate_slug, generate_camera_token
 from app.models.camera import Camera
+from app.routes.main import invalidate_home_cache
 
 router = APIRouter(prefix="/admin")
 templates = Jinja2Templates(directory="templates")
@@ -33,25 +36,29 @@ async def create_camera(
     if existing:
         raise HTTPException(status_code=400, detail="Slug already exists")
     
-    camera = Camera(
+    # Core insert: every returned field is known locally except the id, which
+    # comes from the cursor's lastrowid, so no ORM refresh SELECT is needed
+    camera_token = generate_camera_token()
+    result = db.execute(insert(Camera).values(
         name=name,
         location=location,
         phone_number=phone_number,
         is_residential=is_residential,
         public_slug=public_slug,
-        camera_token=generate_camera_token()
-    )
-    db.add(camera)
+        camera_token=camera_token
+    ))
+    camera_id = result.inserted_primary_key[0]
     db.commit()
-    db.refresh(camera)
+    cache_camera(camera_id, camera_token, public_slug)
+    invalidate_home_cache()
     
-    return JSONResponse({
-        "id": camera.id,
-        "name": camera.name,
-        "location": camera.location,
-        "phone_number": camera.phone_number,
-        "public_url": f"/view/{camera.public_slug}",
-        "camera_url": f"/camera/{camera.camera_token}"
+    return ORJSONResponse({
+        "id": camera_id,
+        "name": name,
+        "location": location,
+        "phone_number": phone_number,
+        "public_url": f"/view/{public_slug}",
+        "camera_url": f"/camera/{camera_token}"
     })
 
 @router.delete("/camera/{camera_id}")
@@ -63,6 +70,8 @@ async def delete_camera(camera_id: int, username: str = Depends(authenticate_adm
     # Actually delete the camera from the database
     db.delete(camera)
     db.commit()
+    uncache_camera(camera_id, camera.camera_token, camera.public_slug)
+    invalidate_home_cache()
     return {"message": "Camera permanently deleted"}
 
 @router.get("/dashboard", response_class=HTMLResponse)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
+from app.core.camera_cache import SLUG_CACHE, TOKEN_CACHE
 from app.core.database import get_db
 from app.models.camera import Camera
 
@@ -10,7 +11,12 @@ templates = Jinja2Templates(directory="templates")
 
 @router.get("/view/{slug}", response_class=HTMLResponse)
 async def view_camera(request: Request, slug: str, db: Session = Depends(get_db)):
-    camera = db.query(Camera).filter(Camera.public_slug == slug, Camera.is_active == True).first()
+    # Known slugs load by primary key; unknown ones fall back to the filtered query
+    camera_id = SLUG_CACHE.get(slug)
+    if camera_id is not None:
+        camera = db.get(Camera, camera_id)
+    else:
+        camera = db.query(Camera).filter(Camera.public_slug == slug, Camera.is_active == True).first()
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
     
@@ -18,7 +24,11 @@ async def view_camera(request: Request, slug: str, db: Session = Depends(get_db)
 
 @router.get("/camera/{token}", response_class=HTMLResponse)
 async def camera_page(request: Request, token: str, db: Session = Depends(get_db)):
-    camera = db.query(Camera).filter(Camera.camera_token == token, Camera.is_active == True).first()
+    camera_id = TOKEN_CACHE.get(token)
+    if camera_id is not None:
+        camera = db.get(Camera, camera_id)
+    else:
+        camera = db.query(Camera).filter(Camera.camera_token == token, Camera.is_active == True).first()
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
     
@@ -1,22 +1,56 @@
+import asyncio
+import time
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from app.core import database
 from app.core.database import get_db
 from app.models.camera import Camera
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# Rendered home page as (rendered_at, html). Cameras rarely change, so the page
+# is served from memory for a few seconds and dropped when cameras change
+HOME_CACHE_TTL = 10  # seconds
+_home_cache: Optional[Tuple[float, str]] = None
+
+def invalidate_home_cache():
+    global _home_cache
+    _home_cache = None
+
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request, db: Session = Depends(get_db)):
-    cameras = db.query(Camera).filter(Camera.is_active == True).all()
-    return templates.TemplateResponse("home.html", {"request": request, "cameras": cameras})
+    global _home_cache
+    now = time.monotonic()
+    if _home_cache and now - _home_cache[0] < HOME_CACHE_TTL:
+        return HTMLResponse(_home_cache[1])
+    
+    # Only the columns the page renders; camera tokens never leave the admin views
+    cameras = db.query(
+        Camera.id, Camera.name, Camera.location, Camera.is_residential, Camera.public_slug
+    ).filter(Camera.is_active == True).all()
+    html = templates.get_template("home.html").render(request=request, cameras=cameras)
+    _home_cache = (now, html)
+    return HTMLResponse(html)
 
 @router.get("/search")
 async def search_cameras(q: str = "", db: Session = Depends(get_db)):
-    cameras = db.query(Camera).filter(
-        Camera.is_active == True,
-        (Camera.name.contains(q) | Camera.location.contains(q))
-    ).all()
+    query = db.query(Camera.id, Camera.name, Camera.location, Camera.public_slug).filter(Camera.is_active == True)
+    if database.search_index_available and len(q) >= 3:
+        # Trigram index lookup; matches need at least 3 characters
+        query = query.filter(
+            text("cameras.id IN (SELECT rowid FROM cameras_fts WHERE cameras_fts MATCH :q)")
+        ).params(q='"' + q.replace('"', '""') + '"')
+    else:
+        query = query.filter(Camera.name.contains(q) | Camera.location.contains(q))
+    cameras = query.all()
     return [{"id": c.id, "name": c.name, "location": c.location, "slug": c.public_slug} for c in cameras]
+
+@router.get("/health")
+async def health():
+    # Reports "uvloop" when uvicorn picked up uvloop, "asyncio.unix_events" otherwise
+    return {"status": "ok", "event_loop": type(asyncio.get_running_loop()).__module__}
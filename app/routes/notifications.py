@@ -1,72 +1,148 @@
-import json
+import asyncio
+import logging
+import threading
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from py_vapid import Vapid
 from pywebpush import webpush, WebPushException
-from app.core.database import get_db
+from app.core.camera_cache import ID_CACHE
+from app.core.database import SessionLocal, get_db
 from app.core.security import VAPID_PRIVATE_KEY, VAPID_CLAIMS
 from app.core.tingtingapi import TingTingAPIClient
-from app.models.camera import Camera, Subscription
+from app.models.camera import Subscription
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Push sends are slow blocking HTTP calls, so they get their own pool instead of
+# queueing behind (and starving) the default executor used for DB work
+PUSH_WORKERS = 16
+_push_executor = ThreadPoolExecutor(max_workers=PUSH_WORKERS, thread_name_prefix="webpush")
+
+# One HTTP session shared by all sends, so pushes to the same service reuse
+# keep-alive TLS connections instead of handshaking per subscriber
+_push_session = requests.Session()
+_push_session.mount("https://", HTTPAdapter(pool_maxsize=PUSH_WORKERS))
+
+# VAPID auth headers by push service origin as (expires_at, headers). The JWT is
+# only bound to the origin, so one signature covers every subscriber there
+VAPID_TOKEN_TTL = 12 * 60 * 60  # seconds, the longest push services accept
+_vapid_headers: Dict[str, Tuple[float, Dict[str, str]]] = {}
+_vapid_lock = threading.Lock()
+_vapid_signer = None
+
+def _get_vapid_headers(endpoint: str) -> Dict[str, str]:
+    global _vapid_signer
+    url = urlparse(endpoint)
+    origin = f"{url.scheme}://{url.netloc}"
+    now = time.time()
+    with _vapid_lock:
+        cached = _vapid_headers.get(origin)
+        if cached and cached[0] - 60 > now:  # Re-sign a minute before expiry
+            return cached[1]
+        
+        if _vapid_signer is None:
+            _vapid_signer = Vapid.from_string(private_key=VAPID_PRIVATE_KEY)
+        expires_at = int(now) + VAPID_TOKEN_TTL
+        headers = _vapid_signer.sign({**VAPID_CLAIMS, "aud": origin, "exp": expires_at})
+        _vapid_headers[origin] = (expires_at, headers)
+        return headers
+
+# New subscriptions are queued and written in batches, so a burst of browsers
+# subscribing costs one INSERT instead of a round trip and commit each
+SUBSCRIPTION_BATCH_SIZE = 100
+SUBSCRIPTION_FLUSH_INTERVAL = 0.5  # seconds
+MAX_SUBSCRIPTION_ATTEMPTS = 5  # Failed batches are requeued up to this many times
+_pending_subscriptions: "asyncio.Queue[Tuple[Dict[str, Any], int]]" = asyncio.Queue()  # (row, attempts)
+
+def _insert_subscriptions(rows: List[Dict[str, Any]]):
+    db = SessionLocal()
+    try:
+        db.execute(insert(Subscription), rows)
+        db.commit()
+    finally:
+        db.close()
+
+async def flush_pending_subscriptions():
+    """Write all queued subscriptions now, in batches; a failed batch is requeued for the next flush"""
+    while not _pending_subscriptions.empty():
+        batch = []
+        while len(batch) < SUBSCRIPTION_BATCH_SIZE and not _pending_subscriptions.empty():
+            batch.append(_pending_subscriptions.get_nowait())
+        try:
+            await asyncio.to_thread(_insert_subscriptions, [row for row, _ in batch])
+        except Exception:
+            logger.exception("❌ Failed to save %d subscriptions", len(batch))
+            for row, attempts in batch:
+                if attempts + 1 < MAX_SUBSCRIPTION_ATTEMPTS:
+                    _pending_subscriptions.put_nowait((row, attempts + 1))
+                else:
+                    logger.error("❌ Giving up on subscription for camera %s: %s", row["camera_id"], row["endpoint"])
+            return  # Retry on the next flush rather than spinning on a locked database
+
+async def subscription_writer():
+    """Background task that flushes queued subscriptions every SUBSCRIPTION_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(SUBSCRIPTION_FLUSH_INTERVAL)
+        await flush_pending_subscriptions()
 
 @router.post("/subscribe/{camera_id}")
-async def subscribe_to_notifications(
-    camera_id: int,
-    subscription_data: dict,
-    db: Session = Depends(get_db)
-):
-    camera = db.query(Camera).filter(Camera.id == camera_id).first()
-    if not camera:
+async def subscribe_to_notifications(camera_id: int, subscription_data: dict):
+    if camera_id not in ID_CACHE:
         raise HTTPException(status_code=404, detail="Camera not found")
     
-    subscription = Subscription(
-        camera_id=camera_id,
-        endpoint=subscription_data.get("endpoint"),
-        p256dh=subscription_data.get("keys", {}).get("p256dh"),
-        auth=subscription_data.get("keys", {}).get("auth")
-    )
-    db.add(subscription)
-    db.commit()
+    keys = subscription_data.get("keys", {})
+    _pending_subscriptions.put_nowait(({
+        "camera_id": camera_id,
+        "endpoint": subscription_data.get("endpoint"),
+        "p256dh": keys.get("p256dh"),
+        "auth": keys.get("auth")
+    }, 0))
     
     return {"message": "Subscribed successfully"}
 
-router.post("/subscribe/{camera_id}")
-async def subscribe_to_notifications(
-    camera_id: int,
-    subscription_data: dict,
-    db: Session = Depends(get_db)
-):
-    camera = db.query(Camera).filter(Camera.id == camera_id).first()
-    if not camera:
-        raise HTTPException(status_code=404, detail="Camera not found")
-    
-    subscription = Subscription(
-        camera_id=camera_id,
-        endpoint=subscription_data.get("endpoint"),
-        p256dh=subscription_data.get("keys", {}).get("p256dh"),
-        auth=subscription_data.get("keys", {}).get("auth")
+def _send_push(sub: Subscription, payload: str):
+    webpush(
+        subscription_info={
+            "endpoint": sub.endpoint,
+            "keys": {"p256dh": sub.p256dh, "auth": sub.auth}
+        },
+        data=payload,
+        # Pre-signed per origin, so webpush skips signing a fresh JWT for every send
+        headers=dict(_get_vapid_headers(sub.endpoint)),
+        requests_session=_push_session
     )
-    db.add(subscription)
-    db.commit()
-    
-    return {"message": "Subscribed successfully"}
 
 @router.post("/trigger-notification/{camera_id}")
 async def trigger_notification(camera_id: int, message: str = "Motion detected!", db: Session = Depends(get_db)):
     subscriptions = db.query(Subscription).filter(Subscription.camera_id == camera_id).all()
+    payload = orjson.dumps({"title": "Camera Alert", "body": message}).decode()  # webpush wants str
     
-    for sub in subscriptions:
-        try:
-            webpush(
-                subscription_info={
-                    "endpoint": sub.endpoint,
-                    "keys": {"p256dh": sub.p256dh, "auth": sub.auth}
-                },
-                data=json.dumps({"title": "Camera Alert", "body": message}),
-                vapid_private_key=VAPID_PRIVATE_KEY,
-                vapid_claims=VAPID_CLAIMS
-            )
-        except WebPushException as e:
-            print(f"Failed to send notification: {e}")
+    # Send to all subscribers concurrently; a failing endpoint doesn't hold up the rest
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(_push_executor, _send_push, sub, payload) for sub in subscriptions),
+        return_exceptions=True
+    )
+    expired_ids = []
+    for sub, result in zip(subscriptions, results):
+        if isinstance(result, Exception):
+            logger.warning("Failed to send notification: %s", result)
+            # 404/410 mean the browser dropped the subscription; it will never succeed again
+            response = getattr(result, "response", None)
+            if isinstance(result, WebPushException) and response is not None and response.status_code in (404, 410):
+                expired_ids.append(sub.id)
+    
+    if expired_ids:
+        db.query(Subscription).filter(Subscription.id.in_(expired_ids)).delete(synchronize_session=False)
+        db.commit()
     
     return {"message": f"Notifications sent to {len(subscriptions)} subscribers"}
@@ -1,37 +1,86 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
 from starlette.websockets import WebSocketState
-from app.core.database import get_db
+from app.core.buffer_pool import get_buffer, return_buffer
+from app.core.camera_cache import lookup_camera_id
 from app.core.websocket_manager import manager
-from app.core.yolo_runner import run_yolo_on_webm
-from app.models.camera import Camera
+from app.core.yolo_runner import run_yolo_on_webm, forget_camera
 import asyncio
-import json
+import logging
+import orjson
+import struct
 import time
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Binary chunk frames are [4-byte big-endian header length][header JSON][chunk bytes]
+CHUNK_HEADER = struct.Struct("!I")
 
 # Store pending video data for each camera
 pending_video_data: Dict[str, Dict[str, Any]] = {}
+MAX_CLIP_PREALLOC = 64 * 1024 * 1024  # Cap on buffer preallocation from client-reported clip size
+
+# Clips that stop receiving chunks (client dropped mid-upload) are purged by a janitor
+PENDING_CLIP_TTL = 60  # seconds without a chunk
+PENDING_SWEEP_INTERVAL = 10  # seconds
 
-# Video processing queue and stats
-video_processing_queue = asyncio.Queue()
+# Background worker management
+_background_worker_started = False
+_worker_count = 3  # Number of parallel YOLO workers
+
+# YOLO runs on its own thread pool sized to the worker count, so long clip
+# inference never occupies the default executor used for DB lookups
+_yolo_executor = ThreadPoolExecutor(max_workers=_worker_count, thread_name_prefix="yolo")
+
+# Video processing queue and stats. The queue is bounded so a YOLO backlog
+# sheds the oldest clips instead of holding multi-MB clips without limit
+video_processing_queue = asyncio.Queue(maxsize=2 * _worker_count)
 processing_stats = {
     'clips_received': 0,
     'clips_processed': 0,
     'clips_failed': 0,
+    'clips_skipped': 0,
     'avg_processing_time': 0,
     'total_processing_time': 0
 }
 
+@dataclass(slots=True)
+class ProcessedClip:
+    """Metadata for a processed clip; the payload itself lives in processed_blobs"""
+    clip_number: int
+    processing_time: float
+    original_size: int
+    processed_size: int
+    timestamp: int  # ms since epoch
+    metadata: Dict[str, Any]
+
 # Processed video queues for each camera (max 10 items)
-processed_video_queues: Dict[str, List[Dict[str, Any]]] = {}
+processed_video_queues: Dict[str, Deque[ProcessedClip]] = {}
 MAX_QUEUE_SIZE = 10
 
-# Background worker management
-_background_worker_started = False
-_worker_count = 3  # Number of parallel YOLO workers
+# Processed clip payloads keyed by (token, clip_number). Queue entries only hold
+# metadata; a blob lives exactly as long as its entry in the camera's queue
+processed_blobs: Dict[Tuple[str, int], bytes] = {}
+
+# Projections served to polling endpoints, rebuilt only when a clip is added
+processed_video_meta_cache: Dict[str, List[Dict[str, Any]]] = {}  # Last 5 clips for stats
+processed_video_next_cache: Dict[str, Dict[str, Any]] = {}  # Clip returned by next-video
+
+# One in-flight clip per camera: clips that arrive while the previous one is
+# still queued or running are dropped and counted as skipped
+camera_inference_slots: Dict[str, asyncio.Semaphore] = {}
+camera_skipped_clips: Dict[str, int] = {}
+
+# Per-camera state is reaped once a camera has been disconnected and idle for
+# CAMERA_STATE_TTL, so tokens that never come back don't accumulate forever
+CAMERA_STATE_TTL = 300  # seconds
+REAPER_INTERVAL = 60  # seconds
+camera_last_seen: Dict[str, float] = {}
 
 async def start_background_workers():
     """Start video processing workers"""
@@ -40,69 +89,116 @@ async def start_background_workers():
         # Start multiple parallel workers
         for i in range(_worker_count):
             asyncio.create_task(video_processing_worker(worker_id=i))
+        asyncio.create_task(reap_idle_camera_state())
+        asyncio.create_task(purge_stale_pending_clips())
         _background_worker_started = True
-        print(f"🚀 {_worker_count} video processing workers started")
+        logger.info("🚀 %s video processing workers started", _worker_count)
 
 # Video processing worker function
 async def video_processing_worker(worker_id: int = 0):
     """Background worker to process video clips with YOLO"""
-    print(f"🔧 Worker {worker_id} started")
+    logger.info("🔧 Worker %s started", worker_id)
     while True:
         try:
             video_task = await video_processing_queue.get()
             await process_video_clip(video_task, worker_id)
             video_processing_queue.task_done()
-        except Exception as e:
-            print(f"❌ Video processing worker {worker_id} error: {e}")
+        except Exception:
+            logger.exception("❌ Video processing worker %s error", worker_id)
             await asyncio.sleep(1)
 
+async def reap_idle_camera_state():
+    """Periodically drop state for cameras that disconnected more than CAMERA_STATE_TTL ago"""
+    while True:
+        await asyncio.sleep(REAPER_INTERVAL)
+        now = time.monotonic()
+        for token, last_seen in list(camera_last_seen.items()):
+            if token in manager.active_connections or now - last_seen < CAMERA_STATE_TTL:
+                continue
+            slot = camera_inference_slots.get(token)
+            if slot and slot.locked():
+                continue  # Clip still being processed
+            
+            camera_last_seen.pop(token, None)
+            for item in processed_video_queues.pop(token, ()):
+                processed_blobs.pop((token, item.clip_number), None)
+            processed_video_meta_cache.pop(token, None)
+            processed_video_next_cache.pop(token, None)
+            camera_inference_slots.pop(token, None)
+            camera_skipped_clips.pop(token, None)
+            forget_camera(token)
+            logger.info("🧹 Reaped idle state for camera %s", token)
+
+async def purge_stale_pending_clips():
+    """Periodically drop partially received clips that stopped getting chunks"""
+    while True:
+        await asyncio.sleep(PENDING_SWEEP_INTERVAL)
+        now = time.monotonic()
+        for token, video_data in list(pending_video_data.items()):
+            if now - video_data['last_chunk_ts'] < PENDING_CLIP_TTL:
+                continue
+            pending_video_data.pop(token, None)
+            if video_data['buf'] is not None:
+                return_buffer(video_data['buf'])
+            logger.warning("🧹 Purged stale partial clip #%s for %s", video_data['clip_number'], token)
+
 async def process_video_clip(task, worker_id: int = 0):
     """Process a single video clip with YOLO inference"""
     token, video_data, clip_number = task['token'], task['video_data'], task['clip_number']
     camera_id = task.get('camera_id', token)  # Use camera_id if available, fallback to token
     
     try:
-        start_time = time.perf_counter()
+        start_time = time.monotonic_ns()
         
-        print(f"🧠 Worker {worker_id} processing video clip #{clip_number} for {token} ({len(video_data) / 1024 / 1024:.2f} MB)")
+        logger.debug("🧠 Worker %s processing video clip #%s for %s (%.2f MB)", worker_id, clip_number, token, len(video_data) / 1024 / 1024)
         
         # Run YOLO inference on the video clip with camera_id for alerts
-        processed_video_bytes = await run_yolo_on_webm(video_data, camera_id)
+        processed_video_bytes = await run_yolo_on_webm(video_data, camera_id, executor=_yolo_executor)
+        
+        # Release the input clip now so its buffer goes back to the pool right away
+        original_size = len(video_data)
+        del video_data
+        release_clip_buffer(task)
         
-        processing_time = time.perf_counter() - start_time
+        processing_time = (time.monotonic_ns() - start_time) / 1e9
         processing_stats['clips_processed'] += 1
         processing_stats['total_processing_time'] += processing_time
         processing_stats['avg_processing_time'] = processing_stats['total_processing_time'] / processing_stats['clips_processed']
         
-        print(f"✅ Worker {worker_id} YOLO processing complete for clip #{clip_number}: {processing_time:.2f}s")
+        logger.info("✅ Worker %s YOLO processing complete for clip #%s: %.2fs", worker_id, clip_number, processing_time)
         
         # Add to processed video queue instead of broadcasting immediately
-        await add_to_processed_queue(token, {
-            'clip_number': clip_number,
-            'video_data': processed_video_bytes,
-            'processing_time': processing_time,
-            'original_size': len(video_data),
-            'processed_size': len(processed_video_bytes),
-            'timestamp': time.time() * 1000,
-            'metadata': task.get('metadata', {})
-        })
+        add_to_processed_queue(token, ProcessedClip(
+            clip_number=clip_number,
+            processing_time=processing_time,
+            original_size=original_size,
+            processed_size=len(processed_video_bytes),
+            timestamp=time.time_ns() // 1_000_000,
+            metadata=task.get('metadata', {})
+        ), processed_video_bytes)
         
-    except Exception as e:
-        print(f"❌ Worker {worker_id} failed to process video clip #{clip_number}: {e}")
+    except Exception:
+        logger.exception("❌ Worker %s failed to process video clip #%s", worker_id, clip_number)
         processing_stats['clips_failed'] += 1
+    finally:
+        release_clip_buffer(task)
+        slot = camera_inference_slots.get(token)
+        if slot:
+            slot.release()
+        camera_last_seen[token] = time.monotonic()
 
 @router.websocket("/ws/camera/{token}")
-async def camera_websocket(websocket: WebSocket, token: str, db: Session = Depends(get_db)):
+async def camera_websocket(websocket: WebSocket, token: str):
     """Video clip streaming endpoint for cameras"""
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
-    if not camera:
+    camera_id = await lookup_camera_id(token)
+    if camera_id is None:
         await websocket.close(code=4404)
         return
     
     # Start background workers if not already started
     await start_background_workers()
     
-    print(f"🎥 Video clip camera connected: {token}")
+    logger.info("🎥 Video clip camera connected: %s", token)
     await manager.connect_camera(websocket, token)
 
     try:
@@ -112,160 +208,251 @@ async def camera_websocket(websocket: WebSocket, token: str, db: Session = Depen
             if message["type"] == "websocket.disconnect":
                 break
 
-            elif message["type"] == "websocket.receive":
-                if "text" in message and message["text"]:
-                    # Handle video metadata and control messages
-                    try:
-                        data = json.loads(message["text"])
-                        await handle_camera_text_message(token, data, websocket)
-                    except json.JSONDecodeError:
-                        print(f"⚠️ Invalid JSON from camera {token}")
+            # Binary video chunks far outnumber control messages, so check them first
+            chunk = message.get("bytes")
+            if chunk:
+                await handle_camera_binary_message(token, chunk)
+                continue
 
-                elif "bytes" in message and message["bytes"]:
-                    # Handle binary video chunk data
-                    await handle_camera_binary_message(token, message["bytes"])
+            text = message.get("text")
+            if text:
+                # Handle video metadata and control messages
+                try:
+                    data = orjson.loads(text)
+                    await handle_camera_text_message(token, data, websocket)
+                except orjson.JSONDecodeError:
+                    logger.warning("⚠️ Invalid JSON from camera %s", token)
 
     except WebSocketDisconnect:
-        print(f"📴 Camera {token} disconnected")
+        logger.info("📴 Camera %s disconnected", token)
     except Exception as e:
-        print(f"❌ Camera {token} error: {e}")
+        logger.error("❌ Camera %s error: %s", token, e)
     finally:
         manager.disconnect_camera(token)
         # Clean up pending video data
         pending_video_data.pop(token, None)
+        _last_feedback_sent.pop(token, None)
+        camera_last_seen[token] = time.monotonic()
 
 async def handle_camera_text_message(token: str, data: Dict[str, Any], websocket: WebSocket):
     """Handle text messages from camera clients"""
-    message_type = data.get("type")
-    
-    if message_type == "video_metadata":
-        # Initialize video data structure for this clip
-        clip_number = data.get("clipNumber")
-        pending_video_data[token] = {
-            'metadata': data,
-            'chunks': [],
-            'expected_chunks': 0,
-            'received_chunks': 0,
-            'clip_number': clip_number
-        }
-        processing_stats['clips_received'] += 1
-        print(f"📹 Receiving video clip #{clip_number} from {token} ({data.get('size', 0) / 1024 / 1024:.2f} MB)")
-        
-    elif message_type == "video_chunk":
-        # Update chunk tracking
-        clip_number = data.get("clipNumber")
-        if token in pending_video_data and pending_video_data[token]['clip_number'] == clip_number:
-            pending_video_data[token]['expected_chunks'] = data.get("totalChunks", 0)
-            
-    elif message_type == "video_complete":
-        # Video fully received, queue for processing
-        clip_number = data.get("clipNumber")
-        await finalize_video_clip(token, clip_number)
-        
-    elif message_type == "performance_feedback":
-        # Handle camera performance feedback
-        await handle_camera_performance_feedback(token, data, websocket)
+    handler = _HANDLERS.get(data.get("type"))
+    if handler:
+        await handler(token, data, websocket)
+
+async def handle_video_metadata(token: str, data: Dict[str, Any], websocket: WebSocket):
+    """Initialize video data structure for a new clip"""
+    clip_number = data.get("clipNumber")
+    # The advertised size only drives preallocation, so a bogus value just means no head start
+    try:
+        advertised_size = max(int(data.get('size') or 0), 0)
+    except (TypeError, ValueError):
+        advertised_size = 0
+    pending_video_data[token] = {
+        'metadata': data,
+        # Chunks are copied straight into one pooled buffer, sized from the advertised clip size
+        'buf': get_buffer(min(advertised_size, MAX_CLIP_PREALLOC)),
+        'size': 0,
+        'expected_chunks': 0,
+        'received_chunks': 0,
+        'clip_number': clip_number,
+        'last_chunk_ts': time.monotonic()
+    }
+    processing_stats['clips_received'] += 1
+    logger.debug("📹 Receiving video clip #%s from %s (%.2f MB)", clip_number, token, advertised_size / 1024 / 1024)
+
+async def handle_video_chunk(token: str, data: Dict[str, Any], websocket: WebSocket):
+    """Update chunk tracking"""
+    clip_number = data.get("clipNumber")
+    if token in pending_video_data and pending_video_data[token]['clip_number'] == clip_number:
+        pending_video_data[token]['expected_chunks'] = data.get("totalChunks", 0)
 
-async def handle_camera_binary_message(token: str, chunk_data: bytes):
-    """Handle binary video chunk data from camera"""
+async def handle_video_complete(token: str, data: Dict[str, Any], websocket: WebSocket):
+    """Video fully received, queue for processing"""
+    await finalize_video_clip(token, data.get("clipNumber"))
+
+async def handle_camera_binary_message(token: str, frame: bytes):
+    """Handle a binary video chunk frame (embedded header + chunk data) from camera"""
     if token not in pending_video_data:
-        print(f"⚠️ Received video chunk for {token} without metadata")
+        logger.warning("⚠️ Received video chunk for %s without metadata", token)
         return
-        
+
+    try:
+        header_len, = CHUNK_HEADER.unpack_from(frame)
+        header_end = CHUNK_HEADER.size + header_len
+        chunk_view = memoryview(frame)
+        header = orjson.loads(chunk_view[CHUNK_HEADER.size:header_end])
+    except (struct.error, orjson.JSONDecodeError):
+        header = None
+    # Valid JSON that isn't an object (e.g. a bare number) is just as malformed
+    if not isinstance(header, dict):
+        logger.warning("⚠️ Malformed video chunk frame from %s", token)
+        return
+
     video_data = pending_video_data[token]
-    video_data['chunks'].append(chunk_data)
+    if header.get("clipNumber") != video_data['clip_number']:
+        logger.warning("⚠️ Chunk for clip #%s while receiving clip #%s from %s",
+                       header.get("clipNumber"), video_data['clip_number'], token)
+        return
+
+    video_data['expected_chunks'] = header.get("totalChunks", 0)
+    chunk = chunk_view[header_end:]
+    offset = video_data['size']
+    video_data['buf'][offset:offset + len(chunk)] = chunk
+    video_data['size'] = offset + len(chunk)
     video_data['received_chunks'] += 1
-    
-    # Log progress periodically
-    if video_data['received_chunks'] % 50 == 0:
-        progress = video_data['received_chunks'] / max(video_data['expected_chunks'], 1) * 100
-        print(f"📦 Clip #{video_data['clip_number']}: {progress:.1f}% received ({video_data['received_chunks']}/{video_data['expected_chunks']} chunks)")
+    video_data['last_chunk_ts'] = time.monotonic()
 
 async def finalize_video_clip(token: str, clip_number: int):
     """Assemble video chunks and queue for YOLO processing"""
     if token not in pending_video_data:
-        print(f"⚠️ No video data found for {token} clip #{clip_number}")
+        logger.warning("⚠️ No video data found for %s clip #%s", token, clip_number)
         return
         
     video_data = pending_video_data[token]
     
     if video_data['clip_number'] != clip_number:
-        print(f"⚠️ Clip number mismatch for {token}: expected {video_data['clip_number']}, got {clip_number}")
+        logger.warning("⚠️ Clip number mismatch for %s: expected %s, got %s", token, video_data['clip_number'], clip_number)
         return
-        
+
+    # Drop the clip if this camera's previous clip is still being processed
+    slot = camera_inference_slots.setdefault(token, asyncio.Semaphore(1))
+    if slot.locked():
+        camera_skipped_clips[token] = camera_skipped_clips.get(token, 0) + 1
+        processing_stats['clips_skipped'] += 1
+        logger.warning("⏭️ Dropped video clip #%s for %s: previous clip still processing", clip_number, token)
+        return_buffer(pending_video_data.pop(token)['buf'])
+        return
+    await slot.acquire()
+
     try:
-        # Assemble all chunks
-        total_size = sum(len(chunk) for chunk in video_data['chunks'])
-        assembled_video = bytearray(total_size)
-        offset = 0
+        # Chunks were assembled on receive; hand YOLO a view of the received bytes and
+        # keep the pooled buffer with the task so the worker can return it afterwards
+        buf = video_data['buf']
+        video_data['buf'] = None
+        video_bytes = memoryview(buf)[:video_data['size']]
         
-        for chunk in video_data['chunks']:
-            assembled_video[offset:offset + len(chunk)] = chunk
-            offset += len(chunk)
-            
-        video_bytes = bytes(assembled_video)
-        
-        print(f"✅ Video clip #{clip_number} assembled: {len(video_bytes) / 1024 / 1024:.2f} MB from {len(video_data['chunks'])} chunks")
+        logger.debug("✅ Video clip #%s assembled: %.2f MB from %s/%s chunks", clip_number,
+                     len(video_bytes) / 1024 / 1024, video_data['received_chunks'], video_data['expected_chunks'])
         
         # Queue for YOLO processing
         task = {
             'token': token,
             'video_data': video_bytes,
+            'buffer': buf,
             'clip_number': clip_number,
             'metadata': video_data['metadata'],
             'camera_id': token  # Use token as camera_id for now, could be improved with actual camera.id
         }
         
-        await video_processing_queue.put(task)
-        print(f"🔄 Video clip #{clip_number} queued for YOLO processing (queue size: {video_processing_queue.qsize()})")
+        try:
+            video_processing_queue.put_nowait(task)
+        except asyncio.QueueFull:
+            # Drop the oldest queued clip to make room for the newest one
+            dropped = video_processing_queue.get_nowait()
+            video_processing_queue.task_done()
+            drop_queued_clip(dropped)
+            video_processing_queue.put_nowait(task)
+        logger.debug("🔄 Video clip #%s queued for YOLO processing (queue size: %s)", clip_number, video_processing_queue.qsize())
         
         # Clean up
         pending_video_data.pop(token, None)
         
     except Exception as e:
-        print(f"❌ Failed to assemble video clip #{clip_number}: {e}")
+        logger.error("❌ Failed to assemble video clip #%s: %s", clip_number, e)
         pending_video_data.pop(token, None)
+        slot.release()
+
+def release_clip_buffer(task: Dict[str, Any]):
+    """Return a clip's pooled receive buffer once its data is no longer needed"""
+    view = task.get('video_data')
+    if isinstance(view, memoryview):
+        view.release()
+    task['video_data'] = None
+    
+    buf = task.pop('buffer', None)
+    if buf is not None:
+        return_buffer(buf)
+
+def drop_queued_clip(task: Dict[str, Any]):
+    """Discard a queued clip that was shed because the processing queue was full"""
+    release_clip_buffer(task)
+    token = task['token']
+    slot = camera_inference_slots.get(token)
+    if slot:
+        slot.release()
+    camera_skipped_clips[token] = camera_skipped_clips.get(token, 0) + 1
+    processing_stats['clips_skipped'] += 1
+    logger.warning("🗑️ Dropped queued video clip #%s for %s: processing queue full", task['clip_number'], token)
+
+# Adaptive streaming suggestions as (processing queue size upper bound, suggestions),
+# checked in order; the last band also applies whenever clips were dropped
+LOAD_BANDS = (
+    (1, {"suggested_recording_interval": 8, "suggested_bitrate": 3000000}),              # Low load: faster recording, higher bitrate
+    (4, {}),                                                                              # Normal load: no change
+    (float("inf"), {"suggested_recording_interval": 15, "suggested_bitrate": 1500000}),  # High load: slower recording, lower bitrate
+)
+
+# Cameras can't react faster than this, so feedback within the window is coalesced
+FEEDBACK_MIN_INTERVAL = 0.5  # seconds
+_last_feedback_sent: Dict[str, float] = {}
 
 async def handle_camera_performance_feedback(token: str, data: Dict[str, Any], websocket: WebSocket):
     """Handle performance feedback from camera clients"""
     try:
+        now = time.monotonic()
+        if now - _last_feedback_sent.get(token, 0) < FEEDBACK_MIN_INTERVAL:
+            return
+        _last_feedback_sent[token] = now
+        
         # Send adaptive streaming suggestions based on processing queue load
         queue_size = video_processing_queue.qsize()
+        skipped = camera_skipped_clips.pop(token, 0)
         
         response = {
             "type": "adaptive_streaming",
             "processing_queue_size": queue_size,
             "avg_processing_time": processing_stats['avg_processing_time'],
-            "clips_processed": processing_stats['clips_processed']
+            "clips_processed": processing_stats['clips_processed'],
+            "clips_skipped": skipped
         }
         
-        # Adjust recording interval based on processing load
-        if queue_size > 3:  # High load
-            response["suggested_recording_interval"] = 15  # Record every 15 seconds instead of 10
-            response["suggested_bitrate"] = 1500000  # Lower bitrate
-        elif queue_size < 1:  # Low load
-            response["suggested_recording_interval"] = 8   # Faster recording
-            response["suggested_bitrate"] = 3000000  # Higher bitrate
+        if skipped:
+            response.update(LOAD_BANDS[-1][1])
+        else:
+            response.update(next(suggestions for limit, suggestions in LOAD_BANDS if queue_size < limit))
             
-        await websocket.send_text(json.dumps(response))
+        # Send the orjson bytes as-is in a binary frame, skipping the str round trip
+        await websocket.send_bytes(orjson.dumps(response))
         
     except Exception as e:
-        print(f"⚠️ Performance feedback error: {e}")
+        logger.warning("⚠️ Performance feedback error: %s", e)
+
+# Camera control message handlers by message type
+_HANDLERS: Dict[str, Callable[[str, Dict[str, Any], WebSocket], Awaitable[None]]] = {
+    "video_metadata": handle_video_metadata,
+    "video_chunk": handle_video_chunk,
+    "video_complete": handle_video_complete,
+    "performance_feedback": handle_camera_performance_feedback,
+}
+
+# Constant payload, encoded once instead of on every viewer connect
+DEPRECATED_VIEWER_MESSAGE = orjson.dumps({
+    "type": "deprecated",
+    "message": "WebSocket viewer is deprecated. Use HTTP polling at /api/camera/{token}/next-video instead"
+}).decode()
 
 @router.websocket("/ws/view/{token}")
-async def viewer_websocket_deprecated(websocket: WebSocket, token: str, db: Session = Depends(get_db)):
+async def viewer_websocket_deprecated(websocket: WebSocket, token: str):
     """DEPRECATED: Video clip viewer endpoint - use HTTP polling instead"""
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
+    camera_id = await lookup_camera_id(token)
     
-    if not camera:
+    if camera_id is None:
         await websocket.close(code=4404)
         return
     
     await websocket.accept()
-    await websocket.send_text(json.dumps({
-        "type": "deprecated",
-        "message": "WebSocket viewer is deprecated. Use HTTP polling at /api/camera/{token}/next-video instead"
-    }))
+    await websocket.send_text(DEPRECATED_VIEWER_MESSAGE)
     await websocket.close(code=4000)
 
 async def relay_performance_to_camera(token: str, viewer_stats: Dict[str, Any]):
@@ -273,10 +460,10 @@ async def relay_performance_to_camera(token: str, viewer_stats: Dict[str, Any]):
     pass
 
 @router.get("/api/camera/{token}/stats")
-async def get_camera_stats(token: str, db: Session = Depends(get_db)):
+async def get_camera_stats(token: str):
     """Get video processing statistics"""
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
-    if not camera:
+    camera_id = await lookup_camera_id(token)
+    if camera_id is None:
         return {"error": "Camera not found"}
     
     # Get connection stats
@@ -284,18 +471,7 @@ async def get_camera_stats(token: str, db: Session = Depends(get_db)):
     processed_queue_size = len(processed_video_queues.get(token, []))
     
     # Get latest clips info
-    latest_clips = []
-    if token in processed_video_queues:
-        queue = processed_video_queues[token]
-        latest_clips = [
-            {
-                "clip_number": item['clip_number'],
-                "timestamp": item['timestamp'],
-                "processing_time": item['processing_time'],
-                "size": item['processed_size']
-            }
-            for item in queue[-5:]  # Last 5 clips
-        ]
+    latest_clips = processed_video_meta_cache.get(token, [])
     
     return {
         "camera_connected": is_camera_connected,
@@ -308,22 +484,48 @@ async def get_camera_stats(token: str, db: Session = Depends(get_db)):
         "max_queue_size": MAX_QUEUE_SIZE
     }
 
-async def add_to_processed_queue(token: str, video_item: Dict[str, Any]):
+def add_to_processed_queue(token: str, video_item: ProcessedClip, video_data: bytes):
     """Add processed video to camera's queue with max capacity"""
     if token not in processed_video_queues:
-        processed_video_queues[token] = []
+        processed_video_queues[token] = deque(maxlen=MAX_QUEUE_SIZE)
     
     queue = processed_video_queues[token]
+    key = (token, video_item.clip_number)
+    if key in processed_blobs:
+        # Clip numbers restart when the camera reconnects; drop the stale clip with this number
+        queue = processed_video_queues[token] = deque(
+            (item for item in queue if item.clip_number != key[1]), maxlen=MAX_QUEUE_SIZE
+        )
+    elif len(queue) == queue.maxlen:
+        # The deque evicts the oldest clip on append, so release its payload first
+        processed_blobs.pop((token, queue[0].clip_number), None)
+    
+    processed_blobs[key] = video_data
     queue.append(video_item)
     
-    # Maintain max queue size
-    while len(queue) > MAX_QUEUE_SIZE:
-        removed = queue.pop(0)  # Remove oldest
-        print(f"📤 Removed old clip #{removed['clip_number']} from {token} queue (queue full)")
+    # Rebuild the polling projections once per clip instead of once per request
+    processed_video_meta_cache[token] = [
+        {
+            "clip_number": item.clip_number,
+            "timestamp": item.timestamp,
+            "processing_time": item.processing_time,
+            "size": item.processed_size
+        }
+        for item in islice(queue, max(len(queue) - 5, 0), None)  # Last 5 clips
+    ]
+    next_item = get_video_for_viewer(token)
+    processed_video_next_cache[token] = {
+        "clip_number": next_item.clip_number,
+        "processing_time": next_item.processing_time,
+        "original_size": next_item.original_size,
+        "processed_size": next_item.processed_size,
+        "timestamp": next_item.timestamp,
+        "available": True
+    }
     
-    print(f"📥 Added clip #{video_item['clip_number']} to {token} queue (size: {len(queue)})")
+    logger.debug("📥 Added clip #%s to %s queue (size: %s)", video_item.clip_number, token, len(queue))
 
-def get_video_for_viewer(token: str) -> Dict[str, Any]:
+def get_video_for_viewer(token: str) -> Optional[ProcessedClip]:
     """Get the 2nd last video from queue for smart buffering"""
     if token not in processed_video_queues:
         return None
@@ -339,73 +541,106 @@ def get_video_for_viewer(token: str) -> Dict[str, Any]:
         return None
 
 @router.get("/api/camera/{token}/next-video")
-async def get_next_video(token: str, db: Session = Depends(get_db)):
+async def get_next_video(token: str):
     """Get the next video clip for viewer (2nd last in queue for smart buffering)"""
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
-    if not camera:
+    camera_id = await lookup_camera_id(token)
+    if camera_id is None:
         return {"error": "Camera not found"}
     
-    video_item = get_video_for_viewer(token)
-    if not video_item:
+    video = processed_video_next_cache.get(token)
+    if not video:
         return {"video": None, "queue_size": 0}
     
-        
     # Return metadata without actual video data for polling
     return {
-        "video": {
-            "clip_number": video_item['clip_number'],
-            "processing_time": video_item['processing_time'],
-            "original_size": video_item['original_size'],
-            "processed_size": video_item['processed_size'],
-            "timestamp": video_item['timestamp'],
-            "available": True
-        },
+        "video": video,
         "queue_size": len(processed_video_queues.get(token, []))
     }
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+async def iter_clip_slices(video_data: bytes):
+    """Yield a processed clip in STREAM_CHUNK_SIZE slices"""
+    for offset in range(0, len(video_data), STREAM_CHUNK_SIZE):
+        yield video_data[offset:offset + STREAM_CHUNK_SIZE]
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header (a list of possibly weak tags, or *) against an ETag"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison, so a W/ prefix doesn't matter
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
 @router.get("/api/camera/{token}/video/{clip_number}")
-async def download_video(token: str, clip_number: int, db: Session = Depends(get_db)):
+async def download_video(token: str, clip_number: int, request: Request):
     """Download specific processed video clip"""
-    from fastapi.responses import Response
+    from fastapi.responses import Response, StreamingResponse
     
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
-    if not camera:
+    camera_id = await lookup_camera_id(token)
+    if camera_id is None:
         return {"error": "Camera not found"}
     
     if token not in processed_video_queues:
         return {"error": "No videos available"}
     
-    # Find the specific clip
+    # Find the specific clip, newest first since recent clips are requested most
     queue = processed_video_queues[token]
-    for video_item in queue:
-        if video_item['clip_number'] == clip_number:
-            return Response(
-                content=video_item['video_data'],
+    for video_item in reversed(queue):
+        if video_item.clip_number == clip_number:
+            # A processed clip never changes, but clip numbers restart when the camera
+            # reconnects, so the processing timestamp is part of the validator
+            etag = f'"{token}-{clip_number}-{video_item.timestamp}"'
+            headers = {
+                "Content-Disposition": f"inline; filename=clip_{clip_number}.webm",
+                "Cache-Control": "public, max-age=3600",
+                "ETag": etag
+            }
+            if etag_matches(request.headers.get("if-none-match", ""), etag):
+                return Response(status_code=304, headers=headers)
+            
+            # Stream in fixed-size slices so the server writes with socket backpressure
+            # instead of handing the whole multi-MB clip to the transport at once
+            video_data = processed_blobs.get((token, clip_number))
+            if video_data is None:
+                break
+            headers["Content-Length"] = str(len(video_data))
+            return StreamingResponse(
+                iter_clip_slices(video_data),
                 media_type="video/webm",
-                headers={
-                    "Content-Disposition": f"inline; filename=clip_{clip_number}.webm",
-                    "Cache-Control": "public, max-age=3600"
-                }
+                headers=headers
             )
     
     return {"error": "Video clip not found"}
 
 @router.get("/api/camera/{token}/latest-video-url")
-async def get_latest_video_url(token: str, db: Session = Depends(get_db)):
+async def get_latest_video_url(token: str):
     """Get URL for the latest processed video for immediate playback"""
-    camera = db.query(Camera).filter(Camera.camera_token == token).first()
-    if not camera:
+    camera_id = await lookup_camera_id(token)
+    if camera_id is None:
         return {"error": "Camera not found"}
     
     video_item = get_video_for_viewer(token)
     if not video_item:
         return {"video_url": None}
     
-    clip_number = video_item['clip_number']
+    clip_number = video_item.clip_number
     video_url = f"/api/camera/{token}/video/{clip_number}"
     
     return {
         "video_url": video_url,
         "clip_number": clip_number,
-        "metadata": video_item
+        "metadata": {
+            "clip_number": clip_number,
+            "processing_time": video_item.processing_time,
+            "original_size": video_item.original_size,
+            "processed_size": video_item.processed_size,
+            "timestamp": video_item.timestamp,
+            "metadata": video_item.metadata
+        }
     }
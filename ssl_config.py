@@ -47,10 +47,27 @@ def get_ssl_config():
     
     return None
 
+def get_server_tuning():
+    """Pick the fastest event loop and HTTP/WebSocket implementations installed."""
+    tuning = {"ws": "websockets"}
+    try:
+        import uvloop  # noqa: F401 - not available on Windows
+        tuning["loop"] = "uvloop"
+    except ImportError:
+        tuning["loop"] = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        tuning["http"] = "httptools"
+    except ImportError:
+        tuning["http"] = "h11"
+    return tuning
+
 def run_server_with_ssl(app, host="0.0.0.0", port=8444):
     """Run the server with appropriate SSL configuration."""
     
     ssl_config = get_ssl_config()
+    tuning = get_server_tuning()
+    print(f"⚡ Event loop: {tuning['loop']}, HTTP parser: {tuning['http']}")
     
     if ssl_config:
         print(f"🔐 Starting HTTPS server ({ssl_config['type']} certificates)...")
@@ -69,7 +86,8 @@ def run_server_with_ssl(app, host="0.0.0.0", port=8444):
             app,
             host=host,
             port=port,
-            **uvicorn_config
+            **uvicorn_config,
+            **tuning
         )
     else:
         print("⚠️  No SSL certificates found!")
@@ -82,7 +100,7 @@ def run_server_with_ssl(app, host="0.0.0.0", port=8444):
         print("2. For production, use Let's Encrypt: certbot --nginx -d yourdomain.com")
         print("3. Or set SSL_CERT_PATH and SSL_KEY_PATH environment variables")
         
-        uvicorn.run(app, host=host, port=port)
+        uvicorn.run(app, host=host, port=port, **tuning)
 
 # Environment-specific configurations
 def get_production_config():
@@ -90,7 +108,10 @@ def get_production_config():
     return {
         "host": "0.0.0.0",
         "port": int(os.environ.get("PORT", 443)),
-        "workers": int(os.environ.get("WORKERS", 4)),
+        # Camera connections, processed clip queues and the token cache all live in
+        # process memory, so a second worker would serve viewers an empty queue.
+        # Scale with a bigger box (YOLO already runs on its own thread pool), not workers
+        "workers": int(os.environ.get("WORKERS", 1)),
         "loop": "uvloop",
         "http": "httptools",
     }
@@ -16,6 +16,7 @@ class EnhancedVideoStreamer {
         this.videoQueue = [];
         this.isProcessingQueue = false;
         this.videoBitrate = 2500000; // 2.5 Mbps default
+        this.textDecoder = new TextDecoder(); // Decodes binary server feedback frames
         
         // Camera selection properties
         this.availableCameras = [];
@@ -80,10 +81,14 @@ class EnhancedVideoStreamer {
         };
 
         this.ws.onmessage = (event) => {
-            // Handle any server messages (like FPS adjustments)
-            if (typeof event.data === 'string') {
+            // Handle any server messages (like FPS adjustments).
+            // Feedback arrives as binary frames holding UTF-8 JSON
+            const text = typeof event.data === 'string'
+                ? event.data
+                : this.textDecoder.decode(event.data);
+            if (text) {
                 try {
-                    const msg = JSON.parse(event.data);
+                    const msg = JSON.parse(text);
                     if (msg.type === 'performance_feedback') {
                         // Log backend performance feedback
                         console.log("Backend performance feedback:", msg);
@@ -93,7 +98,7 @@ class EnhancedVideoStreamer {
                         this.updateCameraInfo(); // Update UI
                     }
                 } catch (e) {
-                    console.log("Server message:", event.data);
+                    console.log("Server message:", text);
                 }
             }
         };
@@ -249,14 +254,15 @@ class EnhancedVideoStreamer {
     async sendVideoInChunks(arrayBuffer, clipNumber) {
         const chunkSize = 64 * 1024; // 64KB chunks
         const totalChunks = Math.ceil(arrayBuffer.byteLength / chunkSize);
+        const encoder = new TextEncoder();
 
         for (let i = 0; i < totalChunks; i++) {
             const start = i * chunkSize;
             const end = Math.min(start + chunkSize, arrayBuffer.byteLength);
-            const chunk = arrayBuffer.slice(start, end);
+            const chunk = new Uint8Array(arrayBuffer, start, end - start);
 
-            // Send chunk header
-            this.ws.send(JSON.stringify({
+            // Chunk header
+            const header = encoder.encode(JSON.stringify({
                 type: 'video_chunk',
                 clipNumber: clipNumber,
                 chunkIndex: i,
@@ -264,8 +270,12 @@ class EnhancedVideoStreamer {
                 chunkSize: chunk.byteLength
             }));
 
-            // Send chunk data
-            this.ws.send(chunk);
+            // Send header and data as a single binary frame: [4-byte header length][header JSON][chunk]
+            const frame = new Uint8Array(4 + header.byteLength + chunk.byteLength);
+            new DataView(frame.buffer).setUint32(0, header.byteLength);
+            frame.set(header, 4);
+            frame.set(chunk, 4 + header.byteLength);
+            this.ws.send(frame);
 
             // Small delay to prevent overwhelming
             if (i % 10 === 0) {